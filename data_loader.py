@@ -1,43 +1,163 @@
 
 import json
-from typing import List
+from typing import Dict, Iterator, List, Optional, Tuple
 
 import config
+from decoder import IssueDecoder
 from model import Issue
+from sampling import DEFAULT_SEED, StratifiedSample, StratifiedSampler
 
 # Store issues as singleton to avoid reloads
 _ISSUES:List[Issue] = None
 
+# Store the sample as singleton when running with --sample
+_SAMPLE:StratifiedSample = None
+
+# Raw updated_date of each loaded issue by number, to detect changes on reload
+_VERSIONS:Dict[int, str] = {}
+
 class DataLoader:
     """
     Loads the issue data into a runtime object.
     """
-    
+
     def __init__(self):
         """
         Constructor
         """
         self.data_path:str = config.get_parameter('ENPM611_PROJECT_DATA_PATH')
-        
+        self.sample_spec = config.get_parameter('sample')
+        self.seed = config.get_parameter('seed')
+        if self.seed is None:
+            self.seed = DEFAULT_SEED
+
     def get_issues(self):
         """
         This should be invoked by other parts of the application to get access
-        to the issues in the data file.
+        to the issues in the data file. When a sample was requested, only the
+        sampled issues are returned (see get_sample()).
         """
         global _ISSUES # to access it within the function
+        if self.sample_spec is not None:
+            return self.get_sample().issues
         if _ISSUES is None:
-            _ISSUES = self._load()
+            decoder = IssueDecoder()
+            _ISSUES = self._load(decoder)
             print(f'Loaded {len(_ISSUES)} issues from {self.data_path}.')
+            if decoder.report.errors:
+                print(decoder.report.describe())
         return _ISSUES
-    
-    def _load(self):
+
+    def get_sample(self) -> StratifiedSample:
+        """
+        Returns the stratified sample of the issues if one was requested
+        with the --sample option, otherwise None.
+        """
+        global _SAMPLE
+        if self.sample_spec is None:
+            return None
+        if _SAMPLE is None:
+            decoder = IssueDecoder()
+            _SAMPLE = StratifiedSampler(self.sample_spec, self.seed).sample(self._iter_records(), decoder.decode)
+            print(_SAMPLE.describe())
+            if decoder.report.errors:
+                print(decoder.report.describe())
+        return _SAMPLE
+
+    def reload(self) -> Optional[Tuple[int, int, int]]:
+        """
+        Re-reads the data file after it was rewritten. Only issues whose
+        number is new or whose updated_date changed are parsed again, all
+        others are reused. Returns the number of added, updated, and removed
+        issues. When running on a sample, the sample is drawn afresh and
+        None is returned.
+        """
+        global _ISSUES, _SAMPLE, _VERSIONS
+        if self.sample_spec is not None:
+            _SAMPLE = None
+            self.get_sample()
+            return None
+
+        decoder = IssueDecoder()
+        with open(self.data_path,'rb') as fin:
+            records = decoder.loads(fin.read())
+        previous = {issue.number: issue for issue in _ISSUES or []}
+        versions = {}
+        issues = []
+        added = updated = 0
+        for jobj in records:
+            number = _number_of(jobj)
+            version = jobj.get('updated_date')
+            if number in previous and number != -1 and _VERSIONS.get(number) == version:
+                issue = previous[number]
+            else:
+                issue = decoder.decode(jobj)
+                if number in previous:
+                    updated += 1
+                else:
+                    added += 1
+            versions[number] = version
+            issues.append(issue)
+        removed = len(previous.keys() - versions.keys())
+
+        _ISSUES = issues
+        _VERSIONS = versions
+        if decoder.report.errors:
+            print(decoder.report.describe())
+        return added, updated, removed
+
+    def _load(self, decoder:IssueDecoder):
         """
         Loads the issues into memory.
         """
+        global _VERSIONS
+        with open(self.data_path,'rb') as fin:
+            records = decoder.loads(fin.read())
+        _VERSIONS = {_number_of(i): i.get('updated_date') for i in records}
+        return decoder.decode_all(records)
+
+    def _iter_records(self, chunk_size:int=1 << 16) -> Iterator[dict]:
+        """
+        Yields the raw issue records one at a time while reading the data
+        file in chunks, so the whole JSON array is never held in memory.
+        """
+        decoder = json.JSONDecoder()
         with open(self.data_path,'r') as fin:
-            return [Issue(i) for i in json.load(fin)]
-    
+            buffer = fin.read(chunk_size).lstrip()
+            if not buffer.startswith('['):
+                raise ValueError(f'Expected a JSON array of issues in {self.data_path}')
+            buffer = buffer[1:]
+            eof = False
+            while True:
+                buffer = buffer.lstrip()
+                if buffer.startswith(','):
+                    buffer = buffer[1:].lstrip()
+                if buffer.startswith(']'):
+                    return
+                try:
+                    record, end = decoder.raw_decode(buffer)
+                except json.JSONDecodeError:
+                    # The next record is not fully buffered yet
+                    if eof:
+                        raise
+                    chunk = fin.read(chunk_size)
+                    eof = not chunk
+                    buffer += chunk
+                    continue
+                yield record
+                buffer = buffer[end:]
+
+
+def _number_of(jobj:dict) -> int:
+    """
+    Returns the issue number of a raw record the same way Issue parses it.
+    """
+    try:
+        return int(jobj.get('number','-1'))
+    except (TypeError, ValueError):
+        return -1
+
 
 if __name__ == '__main__':
     # Run the loader for testing
-    DataLoader().get_issues()
\ No newline at end of file
+    DataLoader().get_issues()
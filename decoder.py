@@ -0,0 +1,250 @@
+"""
+Decodes the raw issue records into Issue and Event objects. The decoding
+functions are generated once from the declared schemas below, so that each
+record is converted in a single pass of straight-line code instead of
+through per-field lookups and conversions. Values that cannot be decoded
+are left empty and tallied per field in a LoadReport.
+"""
+
+import json
+from collections import Counter
+from datetime import datetime
+from typing import Any, List, NamedTuple
+
+from dateutil import parser
+
+from model import Event, Issue, State
+
+# Use orjson to parse the data file if it is installed, it is several times faster
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class Field(NamedTuple):
+    """
+    Declares how one attribute of a model object is decoded.
+    """
+    name: str           # attribute of the model object and key in the JSON record
+    kind: str           # 'str', 'int', 'date', 'state', 'list' (of str), 'logins', or 'events'
+    default: Any = None # value of an 'int' field that is missing or cannot be decoded
+
+
+ISSUE_SCHEMA:List[Field] = [
+    Field('url', 'str'),
+    Field('creator', 'str'),
+    Field('labels', 'list'),
+    Field('state', 'state'),
+    Field('assignees', 'logins'),
+    Field('title', 'str'),
+    Field('text', 'str'),
+    Field('number', 'int', -1),
+    Field('created_date', 'date'),
+    Field('updated_date', 'date'),
+    Field('timeline_url', 'str'),
+    Field('events', 'events'),
+]
+
+EVENT_SCHEMA:List[Field] = [
+    Field('event_type', 'str'),
+    Field('author', 'str'),
+    Field('event_date', 'date'),
+    Field('label', 'str'),
+    Field('comment', 'str'),
+]
+
+# Code generated for each kind of field. {error} is the key the field's errors are tallied under.
+_TEMPLATES = {
+    'str': """
+    v = get({name!r})
+    if v is None or type(v) is str:
+        obj.{name} = v
+    else:
+        obj.{name} = None
+        errors[{error!r}] += 1""",
+    'int': """
+    v = get({name!r})
+    if v is None:
+        obj.{name} = {default!r}
+    else:
+        try:
+            obj.{name} = int(v)
+        except (TypeError, ValueError):
+            obj.{name} = {default!r}
+            errors[{error!r}] += 1""",
+    'date': """
+    v = get({name!r})
+    if v is None:
+        obj.{name} = None
+    else:
+        try:
+            obj.{name} = parse_date(v)
+        except (TypeError, ValueError, OverflowError):
+            obj.{name} = None
+            errors[{error!r}] += 1""",
+    'state': """
+    try:
+        obj.{name} = states.get(get({name!r}))
+    except TypeError:
+        obj.{name} = None
+    if obj.{name} is None:
+        errors[{error!r}] += 1""",
+    'list': """
+    v = get({name!r})
+    if v is None:
+        obj.{name} = []
+    elif type(v) is list:
+        obj.{name} = [s for s in v if type(s) is str]
+        if len(obj.{name}) != len(v):
+            errors[{error!r}] += len(v) - len(obj.{name})
+    else:
+        obj.{name} = []
+        errors[{error!r}] += 1""",
+    'logins': """
+    v = get({name!r})
+    if v is None:
+        obj.{name} = []
+    else:
+        try:
+            obj.{name} = [a if type(a) is str else a['login'] for a in v]
+        except (TypeError, KeyError):
+            obj.{name} = []
+            errors[{error!r}] += 1""",
+    'events': """
+    v = get({name!r})
+    obj.{name} = []
+    if v is None:
+        pass
+    elif type(v) is list:
+        for e in v:
+            if type(e) is dict:
+                obj.{name}.append(decode_event(e, errors))
+            else:
+                errors[{error!r}] += 1
+    else:
+        errors[{error!r}] += 1""",
+}
+
+
+def _compile(function_name:str, model:type, schema:List[Field], namespace:dict):
+    """
+    Generates and compiles the decoding function for a model class from its schema.
+    """
+    prefix = model.__name__.lower()
+    lines = [f"def {function_name}(jobj, errors):",
+             f"    obj = new({model.__name__})",
+             "    get = jobj.get"]
+    for field in schema:
+        lines.append(_TEMPLATES[field.kind].format(
+            name=field.name, default=field.default, error=f'{prefix}.{field.name}'))
+    lines.append("    return obj")
+    exec(compile('\n'.join(lines), f'<{function_name}>', 'exec'), namespace)
+    return namespace[function_name]
+
+
+def parse_date(value:str) -> datetime:
+    """
+    Parses the ISO 8601 dates of the export quickly and falls back to
+    dateutil for any other format.
+    """
+    try:
+        if value[-1:] == 'Z':
+            return datetime.fromisoformat(value[:-1] + '+00:00')
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return parser.parse(value)
+
+
+_NAMESPACE = {
+    'new': object.__new__,
+    'Issue': Issue,
+    'Event': Event,
+    'states': {state.value: state for state in State},
+    'parse_date': parse_date,
+}
+_decode_event = _compile('decode_event', Event, EVENT_SCHEMA, _NAMESPACE)
+_decode_issue = _compile('decode_issue', Issue, ISSUE_SCHEMA, _NAMESPACE)
+
+
+class LoadReport:
+    """
+    Counts the decoded issues and the field values that could not be decoded.
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        self.records:int = 0
+        self.errors:Counter = Counter()
+
+    def describe(self) -> str:
+        if not self.errors:
+            return f"Decoded {self.records} issues without errors."
+        details = ', '.join(f"{field}: {count}" for field, count in self.errors.most_common())
+        return f"Decoded {self.records} issues, {sum(self.errors.values())} values could not be decoded ({details})."
+
+
+class IssueDecoder:
+    """
+    Decodes raw issue records and keeps a LoadReport of the decode errors.
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        self.report = LoadReport()
+
+    def loads(self, data:bytes) -> List[dict]:
+        """
+        Parses the contents of the data file into raw records.
+        """
+        return orjson.loads(data) if orjson is not None else json.loads(data)
+
+    def decode(self, jobj:dict) -> Issue:
+        """
+        Decodes one raw issue record.
+        """
+        self.report.records += 1
+        return _decode_issue(jobj, self.report.errors)
+
+    def decode_all(self, records:List[dict]) -> List[Issue]:
+        """
+        Decodes all raw issue records.
+        """
+        errors = self.report.errors
+        self.report.records += len(records)
+        return [_decode_issue(jobj, errors) for jobj in records]
+
+
+if __name__ == '__main__':
+    # Benchmark the decoder against Issue.from_json on the configured data file
+    import time
+    import config
+
+    data_path = config.get_parameter('ENPM611_PROJECT_DATA_PATH')
+    with open(data_path, 'rb') as fin:
+        data = fin.read()
+
+    start = time.perf_counter()
+    records = json.loads(data)
+    json_time = time.perf_counter() - start
+    print(f"json.loads: {json_time:.3f}s for {len(records)} issues")
+    if orjson is not None:
+        start = time.perf_counter()
+        orjson.loads(data)
+        print(f"orjson.loads: {time.perf_counter() - start:.3f}s")
+
+    start = time.perf_counter()
+    [Issue(jobj) for jobj in records]
+    from_json_time = time.perf_counter() - start
+    print(f"Issue.from_json: {from_json_time:.3f}s")
+
+    decoder = IssueDecoder()
+    start = time.perf_counter()
+    decoder.decode_all(records)
+    decoder_time = time.perf_counter() - start
+    print(f"IssueDecoder: {decoder_time:.3f}s ({from_json_time / decoder_time:.1f}x faster)")
+    print(decoder.report.describe())
@@ -4,6 +4,7 @@ import matplotlib.pyplot as plt
 from typing import List
 from data_loader import DataLoader
 from model import Issue, Event
+from sampling import plot_error_bars, title_suffix
 
 class BugPatternsAnalysis:
     """
@@ -14,10 +15,13 @@ class BugPatternsAnalysis:
         """Constructor"""
         self.bug_keywords = ['bug', 'error', 'fail', 'exception', 'crash', 'not working', 'unexpected']
         self.user = config.get_parameter('user')  # Get the optional user label
+        self.sample = None  # Set when running on a sample of the issues (--sample)
 
     def fetch_and_plot(self):
         """Starting point for the bug pattern analysis."""
-        issues: List[Issue] = DataLoader().get_issues()
+        loader = DataLoader()
+        issues: List[Issue] = loader.get_issues()
+        self.sample = loader.get_sample()
 
         if self.user:
             # Analyze bug patterns for the specific creator if a user label is provided
@@ -28,20 +32,12 @@ class BugPatternsAnalysis:
 
     def analyze_general_bug_patterns(self, issues: List[Issue]):
         """Analyzes and plots bug patterns frequency across all issues."""
-        bug_patterns_count = {}
+        # Detect keywords in titles or labels across all issues and count occurrences
+        bug_patterns_count, estimates = self.count_bug_patterns(issues, self.keywords_in)
 
-        # Loop through issues to detect keywords in titles or labels and count occurrences
-        for issue in issues:
-            issue_text = (issue.title + ' ' + ' '.join(issue.labels)).lower()
-            for keyword in self.bug_keywords:
-                if keyword in issue_text:
-                    bug_patterns_count[keyword] = bug_patterns_count.get(keyword, 0) + 1
-
-        # Sort and print the results
-        bug_patterns_count = sorted(bug_patterns_count.items(), key=lambda x: x[1], reverse=True)
+        # Print the results
         print("\n\nGeneral Bug Patterns and Frequency Analysis:\n")
-        for keyword, count in bug_patterns_count:
-            print(f"{keyword.capitalize()}: {count} occurrences")
+        self.print_counts(bug_patterns_count, estimates)
 
         # Plot the bar chart
         if bug_patterns_count:
@@ -49,12 +45,14 @@ class BugPatternsAnalysis:
             bug_patterns_chart = bug_patterns_df.set_index('Pattern').plot(
                 kind='bar', 
                 figsize=(12, 6), 
-                title="Bug Patterns and Their Frequency"
+                title="Bug Patterns and Their Frequency" + title_suffix(self.sample)
             )
             plt.xlabel("Bug Patterns")
             plt.ylabel("Frequency")
             plt.xticks(rotation=45)  # Rotate x-axis labels by 45 degrees
 
+            if estimates:
+                plot_error_bars(bug_patterns_chart, [estimates[keyword] for keyword, _ in bug_patterns_count])
             for bar in bug_patterns_chart.patches:
                 bug_patterns_chart.annotate(
                     f'{int(bar.get_height())}', 
@@ -70,21 +68,12 @@ class BugPatternsAnalysis:
 
     def analyze_bug_patterns_for_creator(self, issues: List[Issue]):
         """Analyzes and plots bug patterns frequency for a specific creator."""
-        creator_bug_patterns = {}
-
         # Filter issues for the specified creator and detect keywords in titles or labels
-        for issue in issues:
-            if issue.creator == self.user:
-                issue_text = (issue.title + ' ' + ' '.join(issue.labels)).lower()
-                for keyword in self.bug_keywords:
-                    if keyword in issue_text:
-                        creator_bug_patterns[keyword] = creator_bug_patterns.get(keyword, 0) + 1
-
-        # Sort and print results for the specified creator
-        creator_bug_patterns = sorted(creator_bug_patterns.items(), key=lambda x: x[1], reverse=True)
+        creator_bug_patterns, estimates = self.count_bug_patterns(issues, self.creator_keywords_in)
+
+        # Print results for the specified creator
         print(f"\n\nBug Patterns and Frequency Analysis for Creator '{self.user}':\n")
-        for keyword, count in creator_bug_patterns:
-            print(f"{keyword.capitalize()}: {count} occurrences")
+        self.print_counts(creator_bug_patterns, estimates)
 
         # Plot the bar chart for the specified creator
         if creator_bug_patterns:
@@ -92,12 +81,14 @@ class BugPatternsAnalysis:
             creator_bug_patterns_chart = creator_bug_patterns_df.set_index('Pattern').plot(
                 kind='bar', 
                 figsize=(12, 6), 
-                title=f"Bug Patterns for Creator '{self.user}'"
+                title=f"Bug Patterns for Creator '{self.user}'" + title_suffix(self.sample)
             )
             plt.xlabel("Bug Patterns")
             plt.ylabel("Frequency")
             plt.xticks(rotation=45)  # Rotate x-axis labels by 45 degrees
 
+            if estimates:
+                plot_error_bars(creator_bug_patterns_chart, [estimates[keyword] for keyword, _ in creator_bug_patterns])
             for bar in creator_bug_patterns_chart.patches:
                 creator_bug_patterns_chart.annotate(
                     f'{int(bar.get_height())}', 
@@ -111,5 +102,39 @@ class BugPatternsAnalysis:
         else:
             print(f"No bug patterns found for creator '{self.user}'.\n")
 
+    def count_bug_patterns(self, issues: List[Issue], keywords_of):
+        """
+        Counts the keywords returned by keywords_of for each issue, sorted by frequency.
+        When running on a sample, the counts are estimates for all issues and the
+        estimates with their confidence intervals are returned as well.
+        """
+        estimates = None
+        if self.sample:
+            estimates = self.sample.estimate_totals(keywords_of)
+            counts = {keyword: estimate.value for keyword, estimate in estimates.items()}
+        else:
+            counts = {}
+            for issue in issues:
+                for keyword in keywords_of(issue):
+                    counts[keyword] = counts.get(keyword, 0) + 1
+        return sorted(counts.items(), key=lambda x: x[1], reverse=True), estimates
+
+    def keywords_in(self, issue: Issue) -> List[str]:
+        """Returns the bug keywords found in the title or labels of an issue."""
+        issue_text = ((issue.title or '') + ' ' + ' '.join(issue.labels)).lower()
+        return [keyword for keyword in self.bug_keywords if keyword in issue_text]
+
+    def creator_keywords_in(self, issue: Issue) -> List[str]:
+        """Returns the bug keywords of an issue if it was created by the specified creator."""
+        return self.keywords_in(issue) if issue.creator == self.user else []
+
+    def print_counts(self, counts, estimates=None):
+        """Prints the keyword counts, with confidence intervals when they are sample estimates."""
+        for keyword, count in counts:
+            if estimates:
+                print(f"{keyword.capitalize()}: {estimates[keyword]} occurrences (estimated)")
+            else:
+                print(f"{keyword.capitalize()}: {count} occurrences")
+
 if __name__ == "__main__":
     BugPatternsAnalysis().fetch_and_plot()
\ No newline at end of file
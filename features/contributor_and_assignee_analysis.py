@@ -2,6 +2,7 @@ import pandas as pd
 import matplotlib.pyplot as plt
 from collections import Counter
 from data_loader import DataLoader
+from sampling import plot_error_bars, title_suffix
 
 class ContributorAndAssigneeAnalysis:
     """
@@ -12,7 +13,9 @@ class ContributorAndAssigneeAnalysis:
         """
         Constructor
         """
-        self.issues = DataLoader().get_issues()  # Load issues using DataLoader
+        loader = DataLoader()
+        self.issues = loader.get_issues()  # Load issues using DataLoader
+        self.sample = loader.get_sample()  # Set when running on a sample of the issues (--sample)
 
 
     def plot_contributors_assignees_and_labels(self, contributor_df: pd.DataFrame, assignee_df: pd.DataFrame, label_df: pd.DataFrame, top_contributors_count: int, top_assignees_count: int, label: str = None):
@@ -25,12 +28,13 @@ class ContributorAndAssigneeAnalysis:
         # Plot contributors (vertical bar chart)
         contributor_df = contributor_df.nlargest(top_contributors_count, 'Issue Count')
         axes[0].bar(contributor_df['Contributor'], contributor_df['Issue Count'], color='skyblue')
+        plot_error_bars(axes[0], contributor_df.get('Estimate'))
         
         # Set title for contributors based on the label
         if label:
-            axes[0].set_title(f'Top Contributors for {label}')
+            axes[0].set_title(f'Top Contributors for {label}{title_suffix(self.sample)}')
         else:
-            axes[0].set_title('Top Contributors')
+            axes[0].set_title(f'Top Contributors{title_suffix(self.sample)}')
 
         axes[0].set_xlabel('Contributors')
         axes[0].set_ylabel('Number of Issues')
@@ -45,12 +49,13 @@ class ContributorAndAssigneeAnalysis:
         # Plot assignees (vertical bar chart)
         assignee_df = assignee_df.nlargest(top_assignees_count, 'Issue Count')
         axes[1].bar(assignee_df['Assignee'], assignee_df['Issue Count'], color='salmon')
+        plot_error_bars(axes[1], assignee_df.get('Estimate'))
 
         # Set title for assignees based on the label
         if label:
-            axes[1].set_title(f'Top Assignees for {label}')
+            axes[1].set_title(f'Top Assignees for {label}{title_suffix(self.sample)}')
         else:
-            axes[1].set_title('Top Assignees')
+            axes[1].set_title(f'Top Assignees{title_suffix(self.sample)}')
 
         axes[1].set_xlabel('Assignees')
         axes[1].set_ylabel('Number of Issues')
@@ -65,9 +70,10 @@ class ContributorAndAssigneeAnalysis:
         # Plot label frequencies (vertical bar chart)
         label_df = label_df.nlargest(10, 'Frequency')  # Top 10 labels
         axes[2].bar(label_df['Label'], label_df['Frequency'], color='lightgreen')
+        plot_error_bars(axes[2], label_df.get('Estimate'))
 
         # Set title for labels
-        axes[2].set_title('Top Labels')
+        axes[2].set_title(f'Top Labels{title_suffix(self.sample)}')
 
         axes[2].set_xlabel('Labels')
         axes[2].set_ylabel('Frequency')
@@ -95,12 +101,13 @@ class ContributorAndAssigneeAnalysis:
         # Plot contributors (vertical bar chart)
         contributor_df = contributor_df.nlargest(top_contributors_count, 'Issue Count')
         axes[0].bar(contributor_df['Contributor'], contributor_df['Issue Count'], color='skyblue')
+        plot_error_bars(axes[0], contributor_df.get('Estimate'))
         
         # Set title for contributors based on the label
         if label:
-            axes[0].set_title(f'Top Contributors for {label}')
+            axes[0].set_title(f'Top Contributors for {label}{title_suffix(self.sample)}')
         else:
-            axes[0].set_title('Top Contributors')
+            axes[0].set_title(f'Top Contributors{title_suffix(self.sample)}')
 
         axes[0].set_xlabel('Contributors')
         axes[0].set_ylabel('Number of Issues')
@@ -115,12 +122,13 @@ class ContributorAndAssigneeAnalysis:
         # Plot assignees (vertical bar chart)
         assignee_df = assignee_df.nlargest(top_assignees_count, 'Issue Count')
         axes[1].bar(assignee_df['Assignee'], assignee_df['Issue Count'], color='salmon')
+        plot_error_bars(axes[1], assignee_df.get('Estimate'))
 
         # Set title for assignees based on the label
         if label:
-            axes[1].set_title(f'Top Assignees for {label}')
+            axes[1].set_title(f'Top Assignees for {label}{title_suffix(self.sample)}')
         else:
-            axes[1].set_title('Top Assignees')
+            axes[1].set_title(f'Top Assignees{title_suffix(self.sample)}')
 
         axes[1].set_xlabel('Assignees')
         axes[1].set_ylabel('Number of Issues')
@@ -137,66 +145,88 @@ class ContributorAndAssigneeAnalysis:
         plt.show()
 
 
-    def fetch_and_plot(self):
+    @staticmethod
+    def ask_display_counts():
         """
-        Fetches the top contributors and assignees and plots them without any label filter.
+        Asks the user for the number of contributors and assignees to display.
         """
-        # Ask user for the number of contributors and assignees to display
         top_contributors_count = int(input("Enter the number of contributors to display: "))
         top_assignees_count = int(input("Enter the number of assignees to display: "))
-        
-        contributor_counts = {}
-        assignee_counts = {}
-        label_counts = Counter()
-
-        for issue in self.issues:
-            # Count contributors
-            contributor = issue.creator
-            contributor_counts[contributor] = contributor_counts.get(contributor, 0) + 1
-
-            # Count assignees (if any)
-            if issue.assignees:
-                for assignee in issue.assignees:
-                    assignee_username = assignee['login']
-                    assignee_counts[assignee_username] = assignee_counts.get(assignee_username, 0) + 1
+        return top_contributors_count, top_assignees_count
+
+
+    def fetch_and_plot(self, display_counts=None):
+        """
+        Fetches the top contributors and assignees and plots them without any label filter.
+        display_counts is the number of contributors and assignees to display, asked for if not given.
+        """
+        # Ask user for the number of contributors and assignees to display
+        top_contributors_count, top_assignees_count = display_counts or self.ask_display_counts()
+
+        # Estimate the counts for all issues from the sample instead of counting the sampled issues
+        if self.sample:
+            contributor_df = self.estimate_counts(lambda issue: [issue.creator], ['Contributor', 'Issue Count'])
+            assignee_df = self.estimate_counts(lambda issue: issue.assignees, ['Assignee', 'Issue Count'])
+            label_df = self.estimate_counts(lambda issue: issue.labels, ['Label', 'Frequency'])
+        else:
+            contributor_counts = {}
+            assignee_counts = {}
+            label_counts = Counter()
+
+            for issue in self.issues:
+                # Count contributors
+                contributor = issue.creator
+                contributor_counts[contributor] = contributor_counts.get(contributor, 0) + 1
+
+                # Count assignees (if any)
+                if issue.assignees:
+                    for assignee_username in issue.assignees:
+                        assignee_counts[assignee_username] = assignee_counts.get(assignee_username, 0) + 1
 
-            # Count labels (directly from the list of label strings)
-            for label in issue.labels:
-                label_counts[label] += 1
+                # Count labels (directly from the list of label strings)
+                for label in issue.labels:
+                    label_counts[label] += 1
 
-        # Create DataFrames from counts
-        contributor_df = pd.DataFrame(list(contributor_counts.items()), columns=['Contributor', 'Issue Count'])
-        assignee_df = pd.DataFrame(list(assignee_counts.items()), columns=['Assignee', 'Issue Count'])
-        label_df = pd.DataFrame(list(label_counts.items()), columns=['Label', 'Frequency'])
+            # Create DataFrames from counts
+            contributor_df = pd.DataFrame(list(contributor_counts.items()), columns=['Contributor', 'Issue Count'])
+            assignee_df = pd.DataFrame(list(assignee_counts.items()), columns=['Assignee', 'Issue Count'])
+            label_df = pd.DataFrame(list(label_counts.items()), columns=['Label', 'Frequency'])
 
         # Plot the analysis for contributors, assignees, and labels
         self.plot_contributors_assignees_and_labels(contributor_df, assignee_df, label_df, top_contributors_count, top_assignees_count)
 
 
-    def fetch_and_plot_with_label(self, label: str):
+    def fetch_and_plot_with_label(self, label: str, display_counts=None):
         """
         Fetches the top contributors and assignees for a particular label and plots them.
+        display_counts is the number of contributors and assignees to display, asked for if not given.
         """
-        contributor_counts = {}
-        assignee_counts = {}
+        # Estimate the counts for all issues having the label from the sample instead of counting the sampled issues
+        if self.sample:
+            contributor_df = self.estimate_counts(
+                lambda issue: [issue.creator] if label in issue.labels else [], ['Contributor', 'Issue Count'])
+            assignee_df = self.estimate_counts(
+                lambda issue: issue.assignees if label in issue.labels else [], ['Assignee', 'Issue Count'])
+        else:
+            contributor_counts = {}
+            assignee_counts = {}
 
-        # Iterate over all issues and filter them by the provided label
-        for issue in self.issues:
-            if label not in [lbl for lbl in issue.labels]:  # Check if the label is in the issue labels
-                continue
+            # Iterate over all issues and filter them by the provided label
+            for issue in self.issues:
+                if label not in [lbl for lbl in issue.labels]:  # Check if the label is in the issue labels
+                    continue
 
-            # Count contributors
-            contributor = issue.creator
-            contributor_counts[contributor] = contributor_counts.get(contributor, 0) + 1
+                # Count contributors
+                contributor = issue.creator
+                contributor_counts[contributor] = contributor_counts.get(contributor, 0) + 1
 
-            # Count assignees
-            for assignee in issue.assignees:
-                assignee_username = assignee['login']  # Ensure to extract correctly
-                assignee_counts[assignee_username] = assignee_counts.get(assignee_username, 0) + 1
+                # Count assignees
+                for assignee_username in issue.assignees:
+                    assignee_counts[assignee_username] = assignee_counts.get(assignee_username, 0) + 1
 
-        # Create DataFrames from counts
-        contributor_df = pd.DataFrame(list(contributor_counts.items()), columns=['Contributor', 'Issue Count'])
-        assignee_df = pd.DataFrame(list(assignee_counts.items()), columns=['Assignee', 'Issue Count'])
+            # Create DataFrames from counts
+            contributor_df = pd.DataFrame(list(contributor_counts.items()), columns=['Contributor', 'Issue Count'])
+            assignee_df = pd.DataFrame(list(assignee_counts.items()), columns=['Assignee', 'Issue Count'])
 
         # Check if the DataFrames are empty
         if contributor_df.empty and assignee_df.empty:
@@ -204,8 +234,26 @@ class ContributorAndAssigneeAnalysis:
             return
 
         # Ask user for the number of contributors and assignees to display only if data is available
-        top_contributors_count = int(input("Enter the number of contributors to display: "))
-        top_assignees_count = int(input("Enter the number of assignees to display: "))
+        top_contributors_count, top_assignees_count = display_counts or self.ask_display_counts()
 
         # Plot the analysis for contributors and assignees with the specified label
         self.plot_contributors_and_assignees(contributor_df, assignee_df, top_contributors_count, top_assignees_count, label)
+
+
+    def estimate_counts(self, keys_of, columns):
+        """
+        Estimates the counts across all issues from the sample and returns them
+        as a DataFrame with the given columns plus an 'Estimate' column holding the
+        estimates with their 95% confidence interval.
+        """
+        estimates = self.sample.estimate_totals(keys_of)
+        df = pd.DataFrame(
+            [(key, estimate.value, estimate) for key, estimate in estimates.items()],
+            columns=columns + ['Estimate']
+        )
+
+        # Print the estimates so the confidence intervals can be read off exactly
+        print(f"\nEstimated {columns[1]} per {columns[0]} (top 10):")
+        for key, estimate in sorted(estimates.items(), key=lambda x: x[1].value, reverse=True)[:10]:
+            print(f"{key}: {estimate}")
+        return df
@@ -1,5 +1,7 @@
 # Import modules
 import re
+import config
+import numpy as np
 import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
@@ -7,16 +9,30 @@ import matplotlib.pyplot as plt
 from model import Issue
 from typing import List
 from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor
 from data_loader import DataLoader
+from sampling import title_suffix
+from shared_dataset import DatasetSlice, SharedDataset, SharedDatasetHandle
 
 class SeverityAndImpactAnalysis:
     
-    def __init__(self):
+    def __init__(self, issues: List[Issue] = None):
         """
-        Constructor
+        Constructor. Loads the issues through the DataLoader unless they are
+        passed in (e.g., an empty list in worker processes that only score
+        slices of a shared dataset).
         """
-        self.issues: List[Issue] = DataLoader().get_issues()
+        if issues is None:
+            loader = DataLoader()
+            self.issues: List[Issue] = loader.get_issues()
+            self.sample = loader.get_sample()
+        else:
+            self.issues: List[Issue] = issues
+            self.sample = None
+        self.workers = config.get_parameter('workers')
         self.df = pd.DataFrame.from_records([issue.__dict__ for issue in self.issues])
+        # Each issue stands for one issue, or for its share of its stratum when sampled
+        self.df['weight'] = self.sample.weights() if self.sample else 1.0
         self.label_severity_mapping = {'Bug': 5, 'Needs Triage': 3, 'Feature': 1}
         self.state_severity_mapping = {'open': 2, 'closed': 0}
     
@@ -52,6 +68,68 @@ class SeverityAndImpactAnalysis:
         self.df['severity_score'] = self.df.apply(self.calculate_severity, axis=1)
         self.df['impact_score'] = self.df.apply(self.calculate_impact, axis=1)
     
+    def apply_analysis_parallel(self):
+        # Publish the issues once in shared memory and let each worker process score a partition of them in place
+        with SharedDataset.publish(self.issues) as dataset:
+            severity = dataset.add_column('severity_score', np.float64)
+            impact = dataset.add_column('impact_score', np.float64)
+            handle = dataset.handle
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                futures = [executor.submit(score_partition, handle, start, stop)
+                           for start, stop in dataset.partitions(self.workers)]
+                partials = [future.result() for future in futures]
+            self.df['severity_score'] = severity.copy()
+            self.df['impact_score'] = impact.copy()
+            del severity, impact
+
+        # The per-state totals only describe the sampled issues, print_estimates() reports those for all issues
+        if self.sample:
+            print(f"Scored the {len(self.issues)} sampled issues across {len(partials)} worker processes.")
+            return
+
+        # Merge the partial aggregates of the workers
+        totals = self.merge_aggregates(partials)
+        print(f"Scored {len(self.issues)} issues across {len(partials)} worker processes.")
+        for state, total in totals.items():
+            print(f"{state.capitalize()} issues: {total['count']}, "
+                  f"mean severity {total['severity_sum'] / total['count']:.2f} (max {total['severity_max']:.2f}), "
+                  f"mean impact {total['impact_sum'] / total['count']:.2f} (max {total['impact_max']:.0f})")
+
+    def score_slice(self, part: DatasetSlice):
+        # Score the issues of a slice of the shared dataset, writing the scores into its output columns
+        severity = part.column('severity_score')
+        impact = part.column('impact_score')
+        aggregates = {}
+        for i, row in enumerate(part.rows()):
+            severity[i] = self.calculate_severity(row)
+            impact[i] = self.calculate_impact(row)
+
+            # Partial aggregates per state, merged with merge_aggregates()
+            total = aggregates.setdefault(row['state'].value if row['state'] else 'unknown', {
+                'count': 0, 'severity_sum': 0.0, 'impact_sum': 0.0,
+                'severity_max': float('-inf'), 'impact_max': float('-inf')})
+            total['count'] += 1
+            total['severity_sum'] += severity[i]
+            total['impact_sum'] += impact[i]
+            total['severity_max'] = max(total['severity_max'], severity[i])
+            total['impact_max'] = max(total['impact_max'], impact[i])
+        return aggregates
+
+    @staticmethod
+    def merge_aggregates(partials):
+        # Combine the per-state aggregates computed for the individual slices
+        merged = {}
+        for aggregates in partials:
+            for state, total in aggregates.items():
+                if state not in merged:
+                    merged[state] = dict(total)
+                    continue
+                for key in ('count', 'severity_sum', 'impact_sum'):
+                    merged[state][key] += total[key]
+                for key in ('severity_max', 'impact_max'):
+                    merged[state][key] = max(merged[state][key], total[key])
+        return merged
+
     # Plot all the visualizations
     def plot_combined_visualizations(self):        
         # Create the main figure with GridSpec
@@ -60,40 +138,74 @@ class SeverityAndImpactAnalysis:
 
         # Plot severity score distribution (top left)
         ax1 = fig.add_subplot(grid[0, 0])
-        sns.histplot(self.df['severity_score'], kde=True, color='skyblue', ax=ax1)
-        ax1.set_title('Severity Score Distribution')
+        sns.histplot(self.df, x='severity_score', kde=len(self.df) > 1, color='skyblue', ax=ax1, **self.histogram_weights('severity_score'))
+        ax1.set_title('Severity Score Distribution' + title_suffix(self.sample))
         ax1.set_xlabel('Severity Score')
         ax1.set_ylabel('Frequency')
 
         # Plot impact score distribution (top right)
         ax2 = fig.add_subplot(grid[0, 1])
-        sns.histplot(self.df['impact_score'], kde=True, color='coral', ax=ax2)
-        ax2.set_title('Impact Score Distribution')
+        sns.histplot(self.df, x='impact_score', kde=len(self.df) > 1, color='coral', ax=ax2, **self.histogram_weights('impact_score'))
+        ax2.set_title('Impact Score Distribution' + title_suffix(self.sample))
         ax2.set_xlabel('Impact Score')
         ax2.set_ylabel('Frequency')
 
         # Plot severity vs impact (spans across two columns in bottom row)
         ax3 = fig.add_subplot(grid[1, :])
         sns.scatterplot(x='severity_score', y='impact_score', data=self.df, hue='state', palette="coolwarm", ax=ax3)
-        ax3.set_title('Severity vs Impact of Issues')
+        ax3.set_title('Severity vs Impact of Issues' + title_suffix(self.sample))
         ax3.set_xlabel('Severity Score')
         ax3.set_ylabel('Impact Score')
 
         plt.title("Severity and Impact analysis")
         plt.show()
 
+    def print_estimates(self):
+        # Estimate counts and mean scores across all issues from the sample
+        print("\nEstimates for all issues (95% confidence intervals):")
+        for state, estimate in self.sample.estimate_totals(lambda issue: [issue.state.value if issue.state else 'unknown']).items():
+            print(f"{state.capitalize()} issues: {estimate}")
+        for column in ['severity_score', 'impact_score']:
+            estimate = self.sample.estimate_mean(self.df[column].tolist())
+            print(f"Mean {column.replace('_', ' ')}: {estimate.format(2)}")
+
+    def histogram_weights(self, column):
+        # Scale sampled histograms up to all issues, with as many bins as the unweighted histogram
+        if not self.sample:
+            return {}
+        return {'weights': 'weight', 'bins': len(np.histogram_bin_edges(self.df[column], bins='auto')) - 1}
+
     def fetch_and_plot(self):
                 
         # Basic statistics output
-        print(f"Found {len(self.issues)} issues.")
+        if self.sample:
+            print(f"Sampled {len(self.issues)} of {self.sample.population_size} issues.")
+        else:
+            print(f"Found {len(self.issues)} issues.")
+        
+        # Generate features, split across worker processes if --workers is given
+        if self.workers and self.workers > 1:
+            self.apply_analysis_parallel()
+        else:
+            self.apply_analysis()
         
-        # Generate features
-        self.apply_analysis()
+        # Scaled estimates for the full set of issues when running on a sample
+        if self.sample:
+            self.print_estimates()
         
         # Plotting visualizations
         self.plot_combined_visualizations()
 
 
+def score_partition(handle: SharedDatasetHandle, start: int, stop: int):
+    # Runs in a worker process: attach to the shared dataset without copying and score one partition
+    dataset = SharedDataset.attach(handle)
+    try:
+        return SeverityAndImpactAnalysis(issues=[]).score_slice(dataset.slice(start, stop))
+    finally:
+        dataset.close()
+
+
 if __name__ == '__main__':
     # fetch and plot method when running this module directly
     SeverityAndImpactAnalysis().fetch_and_plot()
\ No newline at end of file
@@ -64,7 +64,7 @@ class Issue:
         self.creator = jobj.get('creator')
         self.labels = jobj.get('labels',[])
         self.state = State[jobj.get('state')]
-        self.assignees = jobj.get('assignees',[])
+        self.assignees = [a if isinstance(a, str) else a['login'] for a in jobj.get('assignees',[])]
         self.title = jobj.get('title')
         self.text = jobj.get('text')
         try:
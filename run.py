@@ -6,7 +6,14 @@ the command line to run the analyses.
 """
 
 import argparse
+import time
+import traceback
 import config
+import sampling
+import matplotlib.pyplot as plt
+
+from data_loader import DataLoader
+from watcher import DataFileWatcher
 
 from features.bug_pattern_analysis import BugPatternsAnalysis
 from features.contributor_and_assignee_analysis import ContributorAndAssigneeAnalysis
@@ -37,27 +44,108 @@ def parse_args():
     ap.add_argument('--label', '-l', type=str, required=False,
                     help='Optional parameter for analyses focusing on a specific label')
     
+    # Optional parameter to preview the analyses on a stratified sample of the issues
+    ap.add_argument('--sample', '-s', type=sampling.parse_sample_spec, required=False,
+                    help='Optional fraction (e.g. 0.05) or count (e.g. 500) of issues to sample for a quick preview')
+    
+    # Optional parameter to draw a different, but still reproducible, sample
+    ap.add_argument('--seed', type=int, required=False,
+                    help=f'Optional random seed for --sample (defaults to {sampling.DEFAULT_SEED})')
+    
+    # Optional parameter to split the analysis across worker processes sharing one copy of the issues
+    ap.add_argument('--workers', '-w', type=int, required=False,
+                    help='Optional number of worker processes for the analyses that support it (feature 3)')
+    
+    # Optional flag to keep the analysis up to date while the data file is being rewritten
+    ap.add_argument('--watch', action='store_true',
+                    help='Watch the data file and re-run the analysis whenever it changes')
+    
     return ap.parse_args()
 
 
 
-# Parse feature to call from command line arguments
-args = parse_args()
-# Add arguments to config so that they can be accessed in other parts of the application
-config.overwrite_from_args(args)
+def run_feature(args, display_counts=None):
+    """
+    Runs the feature specified in the --feature flag. display_counts is passed
+    to feature 2 so it does not ask for them again (see watch()).
+    """
+    if args.feature == 1:
+        BugPatternsAnalysis().fetch_and_plot()
+    elif args.feature == 2:
+        # Handle label option for feature 2
+        if args.label:
+            # Pass label as parameter to the function
+            ContributorAndAssigneeAnalysis().fetch_and_plot_with_label(args.label, display_counts)
+        else:
+            # Default behavior for feature 2 when no label is passed
+            ContributorAndAssigneeAnalysis().fetch_and_plot(display_counts)
+    elif args.feature == 3:
+        SeverityAndImpactAnalysis().fetch_and_plot()
+    else:
+        print('Need to specify which feature to run with --feature flag.')
+
+
+def watch(args):
+    """
+    Runs the feature, then re-runs it every time the data file is rewritten.
+    Only the issues that changed are parsed again and the plots are redrawn
+    in place instead of blocking until their window is closed.
+    """
+    def refresh():
+        start = time.perf_counter()
+        try:
+            changes = DataLoader().reload()
+        except (OSError, ValueError) as e:
+            # The file may still be incomplete, wait for the next write
+            print(f'Could not reload the data file: {e}')
+            return
+        plt.close('all')
+        try:
+            run_feature(args, display_counts)
+        except Exception:
+            # Keep watching, the next version of the file may analyze fine
+            print('Could not refresh the analysis:')
+            traceback.print_exc()
+            return
+        if changes is None:
+            print(f'Refreshed with a new sample in {time.perf_counter() - start:.2f}s.')
+        else:
+            print(f'Refreshed in {time.perf_counter() - start:.2f}s '
+                  f'({changes[0]} added, {changes[1]} updated, {changes[2]} removed issues).')
+
+    def pause(seconds):
+        # Keep open plot windows responsive while waiting
+        if plt.get_fignums():
+            plt.pause(seconds)
+        else:
+            time.sleep(seconds)
+
+    data_path = config.get_parameter('ENPM611_PROJECT_DATA_PATH')
+    watcher = DataFileWatcher(data_path, refresh, sleep=pause)
+
+    # Note the version of the file before the first, slowest load, so that a rewrite during it is picked up
+    baseline = watcher.signature()
+    plt.ion()
+
+    # Feature 2 asks how many contributors and assignees to display, only do so once
+    display_counts = ContributorAndAssigneeAnalysis.ask_display_counts() if args.feature == 2 else None
+    run_feature(args, display_counts)
+
+    print(f'Watching {data_path} for changes (press Ctrl+C to stop).')
+    try:
+        watcher.watch(baseline)
+    except KeyboardInterrupt:
+        print('Stopped watching.')
+
+
+if __name__ == '__main__':
+    # Parse feature to call from command line arguments
+    args = parse_args()
+    # Add arguments to config so that they can be accessed in other parts of the application
+    config.overwrite_from_args(args)
     
-# Run the feature specified in the --feature flag
-if args.feature == 1:
-    BugPatternsAnalysis().fetch_and_plot()
-elif args.feature == 2:
-    # Handle label option for feature 2
-    if args.label:
-        # Pass label as parameter to the function
-        ContributorAndAssigneeAnalysis().fetch_and_plot_with_label(args.label)
+    # Run the feature specified in the --feature flag, and again on every change with --watch
+    if args.watch:
+        watch(args)
     else:
-        # Default behavior for feature 2 when no label is passed
-        ContributorAndAssigneeAnalysis().fetch_and_plot()
-elif args.feature == 3:
-    SeverityAndImpactAnalysis().fetch_and_plot()
-else:
-    print('Need to specify which feature to run with --feature flag.')
+        run_feature(args)
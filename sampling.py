@@ -0,0 +1,311 @@
+"""
+Implements stratified sampling over the stream of issues so that the
+analyses can be previewed on a small, reproducible subset of a large
+export. Issues are stratified by their state and primary label, and the
+sample keeps track of how many issues each stratum holds in the full
+export so that counts can be scaled back up to estimates with
+confidence intervals.
+"""
+
+import math
+import random
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, NamedTuple, Tuple
+
+from model import Issue, State
+
+# Seed used when no --seed is given so that repeated previews agree
+DEFAULT_SEED = 611
+
+# Valid values of the state of a raw record
+_STATES = {state.value for state in State}
+
+# z-value of the two-sided 95% confidence interval
+Z_95 = 1.96
+
+# Stratum that strata with too few sampled issues are pooled into
+POOLED_STRATUM = ('pooled', 'pooled')
+
+# Strata with fewer sampled issues are pooled, as their variance estimates are too unreliable
+MIN_STRATUM_SAMPLE = 5
+
+
+class Estimate(NamedTuple):
+    """
+    A value estimated from a sample together with its 95% confidence
+    interval. low and high are None when the sample is too small to
+    estimate the interval.
+    """
+    value: float
+    low: float
+    high: float
+
+    def format(self, precision:int=0) -> str:
+        if self.low is None:
+            return f"~{self.value:.{precision}f} (95% CI unavailable, sample too small)"
+        return f"~{self.value:.{precision}f} (95% CI {self.low:.{precision}f}-{self.high:.{precision}f})"
+
+    def __str__(self):
+        return self.format()
+
+
+def parse_sample_spec(value):
+    """
+    Parses the value of the --sample option. A number between 0 and 1
+    written with a decimal point (e.g., 0.05) is a fraction of the issues,
+    a whole number (e.g., 500) is the number of issues to draw.
+    """
+    if isinstance(value, str):
+        value = value.strip()
+        value = float(value) if '.' in value else int(value)
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"Invalid sample size '{value}'")
+    if isinstance(value, int):
+        if value < 1:
+            raise ValueError(f"Sample count must be at least 1, got {value}")
+    elif not 0 < value <= 1:
+        raise ValueError(f"Sample fraction must be in (0, 1], got {value}")
+    return value
+
+
+def stratum_of(jobj:dict) -> Tuple[str, str]:
+    """
+    Returns the stratum of a raw issue record: its state and its
+    primary (first) label. Either is None if it is missing or invalid,
+    so that malformed records are sampled like the others.
+    """
+    state = jobj.get('state')
+    labels = jobj.get('labels')
+    label = labels[0] if type(labels) is list and labels else None
+    return (state if type(state) is str and state in _STATES else None,
+            label if type(label) is str else None)
+
+
+class StratifiedSample:
+    """
+    Issues drawn from each stratum together with the size of every
+    stratum in the full export, used to scale results back up.
+    """
+
+    def __init__(self, strata:Dict[Tuple[str, str], List[Issue]], population:Dict[Tuple[str, str], int], spec, seed:int,
+                 pooled:int=0):
+        """
+        Constructor. pooled is the number of strata that had too few sampled
+        issues of their own and were pooled with others.
+        """
+        self.strata = strata
+        self.population = population
+        self.spec = spec
+        self.seed = seed
+        self.pooled = pooled
+        self.issues:List[Issue] = [issue for members in strata.values() for issue in members]
+        self.population_size:int = sum(population.values())
+
+    def weights(self) -> List[float]:
+        """
+        Returns, aligned with self.issues, how many issues of the full
+        export each sampled issue stands for.
+        """
+        return [self.population[key] / len(members)
+                for key, members in self.strata.items() for _ in members]
+
+    def estimate_totals(self, keys_of:Callable[[Issue], Iterable]) -> Dict[any, Estimate]:
+        """
+        Estimates, for every key returned by keys_of, how often it occurs
+        across the full export. keys_of is called once per sampled issue
+        and may return the same key several times.
+        """
+        totals = Counter()
+        variances = Counter()
+        available = self._variance_available()
+        for key, members in self.strata.items():
+            n = len(members)
+            N = self.population[key]
+            if n == 0:
+                continue
+            sums = Counter()
+            squares = Counter()
+            for issue in members:
+                for k, y in Counter(keys_of(issue)).items():
+                    sums[k] += y
+                    squares[k] += y * y
+            for k, s in sums.items():
+                totals[k] += N * s / n
+                if n > 1:
+                    s2 = (squares[k] - s * s / n) / (n - 1)
+                    variances[k] += N * N * (1 - n / N) * s2 / n
+        return {k: self._interval(t, variances[k], available) for k, t in totals.items()}
+
+    def estimate_mean(self, values:List[float]) -> Estimate:
+        """
+        Estimates the mean over the full export of a value computed for
+        each sampled issue. values must be aligned with self.issues.
+        """
+        mean = 0.0
+        variance = 0.0
+        offset = 0
+        for key, members in self.strata.items():
+            n = len(members)
+            N = self.population[key]
+            if n == 0:
+                continue
+            share = N / self.population_size
+            ys = values[offset:offset + n]
+            offset += n
+            y_bar = sum(ys) / n
+            mean += share * y_bar
+            if n > 1:
+                s2 = sum((y - y_bar) ** 2 for y in ys) / (n - 1)
+                variance += share * share * (1 - n / N) * s2 / n
+        if not self._variance_available():
+            return Estimate(mean, None, None)
+        half = Z_95 * math.sqrt(variance)
+        return Estimate(mean, mean - half, mean + half)
+
+    def describe(self) -> str:
+        """
+        Returns a banner that marks results as coming from a sample.
+        """
+        share = 100 * len(self.issues) / self.population_size if self.population_size else 0
+        pooled = f", {self.pooled} small strata pooled" if self.pooled else ""
+        return (f"SAMPLE: {len(self.issues)} of {self.population_size} issues ({share:.1f}%), "
+                f"stratified by state and label across {len(self.strata)} strata{pooled} (seed {self.seed}). "
+                f"Counts below are scaled estimates.")
+
+    def _variance_available(self) -> bool:
+        """
+        The variance of a stratum can only be estimated from two or more of
+        its issues, unless all of its issues were sampled.
+        """
+        return all(len(members) >= 2 or len(members) == self.population[key]
+                   for key, members in self.strata.items())
+
+    def _interval(self, total:float, variance:float, available:bool) -> Estimate:
+        if not available:
+            return Estimate(total, None, None)
+        half = Z_95 * math.sqrt(variance)
+        return Estimate(total, max(0.0, total - half), total + half)
+
+
+class StratifiedSampler:
+    """
+    Draws a sample from a stream of raw issue records and stratifies it
+    afterwards, so only the sampled records are ever turned into Issue
+    objects and kept in memory.
+    """
+
+    def __init__(self, spec, seed:int=DEFAULT_SEED):
+        """
+        Constructor
+        """
+        self.spec = parse_sample_spec(spec)
+        self.seed = seed
+
+    def sample(self, records:Iterable[dict], decode:Callable[[dict], Issue]=Issue) -> StratifiedSample:
+        """
+        Consumes the records once and returns the stratified sample. Only
+        the sampled records are turned into issues with decode.
+        """
+        rng = random.Random(self.seed)
+        if isinstance(self.spec, int):
+            kept, population = self._reservoir_sample(records, rng, self.spec)
+        else:
+            kept, population = self._bernoulli_sample(records, rng, self.spec)
+        members, population, pooled = self._post_stratify(kept, population)
+        strata = {key: [decode(jobj) for jobj in records] for key, records in members.items()}
+        return StratifiedSample(strata, population, self.spec, self.seed, pooled)
+
+    def _reservoir_sample(self, records, rng, capacity):
+        """
+        Keeps one uniform reservoir of up to capacity records over the whole
+        stream (Algorithm R), so memory is bounded by the requested count no
+        matter how many strata there are. Each record is kept together with
+        its stratum and the size of every stratum is counted along the way.
+        """
+        reservoir = []
+        population = Counter()
+        for seen, jobj in enumerate(records):
+            key = stratum_of(jobj)
+            population[key] += 1
+            if len(reservoir) < capacity:
+                reservoir.append((key, jobj))
+            else:
+                j = rng.randrange(seen + 1)
+                if j < capacity:
+                    reservoir[j] = (key, jobj)
+        return reservoir, population
+
+    def _bernoulli_sample(self, records, rng, fraction):
+        """
+        Keeps every record with probability fraction, together with its stratum.
+        """
+        kept = []
+        population = Counter()
+        for jobj in records:
+            key = stratum_of(jobj)
+            population[key] += 1
+            if rng.random() < fraction:
+                kept.append((key, jobj))
+        return kept, population
+
+    def _post_stratify(self, kept, population):
+        """
+        Groups the sampled records by stratum. Both sampling methods give
+        every record the same chance, so the records of each stratum, or of
+        several strata taken together, are a uniform sample of them. Strata
+        with fewer than MIN_STRATUM_SAMPLE sampled records give unreliable
+        variance estimates, so they are pooled into one stratum, which is in turn merged into
+        the largest stratum if it is still too small.
+        """
+        members = {}
+        for key, jobj in kept:
+            members.setdefault(key, []).append(jobj)
+        strata = {key: records for key, records in members.items() if len(records) >= MIN_STRATUM_SAMPLE}
+        sizes = {key: population[key] for key in strata}
+
+        small = [key for key in population if key not in strata]
+        if small:
+            pooled = [jobj for key in small for jobj in members.get(key, [])]
+            pooled_size = sum(population[key] for key in small)
+            if len(pooled) >= MIN_STRATUM_SAMPLE or not strata:
+                strata[POOLED_STRATUM] = pooled
+                sizes[POOLED_STRATUM] = pooled_size
+            else:
+                largest = max(strata, key=sizes.get)
+                strata[largest] = strata[largest] + pooled
+                sizes[largest] += pooled_size
+        return strata, sizes, len(small)
+
+
+def title_suffix(sample:StratifiedSample) -> str:
+    """
+    Returns what to append to chart titles to mark results that come from a sample.
+    """
+    return f" (sample of {len(sample.issues)} issues, estimated)" if sample else ""
+
+
+def plot_error_bars(ax, estimates:Iterable[Estimate]):
+    """
+    Draws the confidence intervals of estimates onto a bar chart with one
+    bar per estimate, in the same order. Does nothing if estimates is None.
+    """
+    if estimates is None:
+        return
+    estimates = list(estimates)
+    ax.errorbar(
+        range(len(estimates)),
+        [e.value for e in estimates],
+        yerr=error_bars(estimates),
+        fmt='none',
+        ecolor='black',
+        capsize=4
+    )
+
+
+def error_bars(estimates:List[Estimate]) -> List[List[float]]:
+    """
+    Returns the lower and upper error bar lengths for plotting estimates
+    with matplotlib's errorbar().
+    """
+    return [[e.value - e.low if e.low is not None else 0 for e in estimates],
+            [e.high - e.value if e.high is not None else 0 for e in estimates]]
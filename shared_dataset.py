@@ -0,0 +1,274 @@
+"""
+Publishes the columns of the parsed issues once in shared memory so that
+analysis worker processes can attach to them without reloading the data
+file or receiving a pickled copy of every issue. Workers only receive a
+small handle and read (or write their results into) zero-copy numpy
+views of the shared blocks, typically over a slice of the issues.
+"""
+
+import math
+from datetime import datetime, timezone
+from multiprocessing import shared_memory
+from typing import Dict, Iterator, List, NamedTuple, Tuple
+
+import numpy as np
+
+from model import Issue, State
+
+_STATES:List[State] = list(State)
+
+
+class ColumnSpec(NamedTuple):
+    """
+    Where a column lives in shared memory and how to view it.
+    """
+    shm_name: str
+    dtype: str
+    length: int
+
+
+class SharedDatasetHandle(NamedTuple):
+    """
+    Small, picklable description of a published dataset that is passed
+    to the worker processes so they can attach to it.
+    """
+    size: int
+    columns: Dict[str, ColumnSpec]
+    creators: List[str]
+    labels: List[str]
+    assignees: List[str]
+
+
+class SharedDataset:
+    """
+    Columnar view of the issues backed by shared memory. The process that
+    publishes the dataset owns the memory and unlinks it when closed,
+    attached processes only close their own mapping.
+
+    Scalar fields are stored one value per issue. Labels, assignees, titles
+    and texts vary in length per issue and are stored as a flat array of
+    values plus an array of offsets where each issue's values start.
+    Missing titles and texts come back as empty strings.
+    """
+
+    def __init__(self, handle:SharedDatasetHandle, blocks:Dict[str, shared_memory.SharedMemory], owner:bool):
+        """
+        Constructor. Use publish() or attach() rather than calling this directly.
+        """
+        self._specs = dict(handle.columns)
+        self._blocks = blocks
+        self._owner = owner
+        self.size:int = handle.size
+        self.creators:List[str] = handle.creators
+        self.labels:List[str] = handle.labels
+        self.assignees:List[str] = handle.assignees
+        self.columns:Dict[str, np.ndarray] = {
+            name: np.ndarray((spec.length,), dtype=spec.dtype, buffer=blocks[name].buf)
+            for name, spec in self._specs.items()
+        }
+
+    @classmethod
+    def publish(cls, issues:List[Issue]) -> 'SharedDataset':
+        """
+        Copies the columns of the issues into shared memory once.
+        """
+        creators = _Vocabulary()
+        labels = _Vocabulary()
+        assignees = _Vocabulary()
+
+        arrays = {
+            'number': np.array([issue.number for issue in issues], dtype=np.int64),
+            'state': np.array([_STATES.index(issue.state) if issue.state else -1 for issue in issues], dtype=np.int8),
+            'created_date': np.array([_timestamp(issue.created_date) for issue in issues], dtype=np.float64),
+            'updated_date': np.array([_timestamp(issue.updated_date) for issue in issues], dtype=np.float64),
+            'event_count': np.array([len(issue.events) for issue in issues], dtype=np.int32),
+            'creator': np.array([creators.code(issue.creator) for issue in issues], dtype=np.int32),
+        }
+        arrays.update(_ragged('label', [[labels.code(label) for label in issue.labels] for issue in issues], np.int32))
+        arrays.update(_ragged('assignee', [[assignees.code(assignee) for assignee in issue.assignees] for issue in issues], np.int32))
+        arrays.update(_ragged('title', [(issue.title or '').encode('utf-8') for issue in issues], np.uint8))
+        arrays.update(_ragged('text', [(issue.text or '').encode('utf-8') for issue in issues], np.uint8))
+
+        blocks = {}
+        specs = {}
+        for name, array in arrays.items():
+            blocks[name], specs[name] = _share(array)
+        handle = SharedDatasetHandle(len(issues), specs, creators.values, labels.values, assignees.values)
+        return cls(handle, blocks, owner=True)
+
+    @classmethod
+    def attach(cls, handle:SharedDatasetHandle) -> 'SharedDataset':
+        """
+        Attaches to a dataset published by another process without copying it.
+        """
+        blocks = {name: shared_memory.SharedMemory(name=spec.shm_name) for name, spec in handle.columns.items()}
+        return cls(handle, blocks, owner=False)
+
+    @property
+    def handle(self) -> SharedDatasetHandle:
+        """
+        Returns the handle to pass to worker processes.
+        """
+        return SharedDatasetHandle(self.size, dict(self._specs), self.creators, self.labels, self.assignees)
+
+    def add_column(self, name:str, dtype) -> np.ndarray:
+        """
+        Adds a zero-filled column with one value per issue, e.g. so that
+        workers can write their per-issue results in place. Columns must be
+        added before the handle is passed to the workers.
+        """
+        if not self._owner:
+            raise RuntimeError('Only the process that published the dataset can add columns')
+        block, spec = _share(np.zeros(self.size, dtype=dtype))
+        self._blocks[name] = block
+        self._specs[name] = spec
+        self.columns[name] = np.ndarray((spec.length,), dtype=spec.dtype, buffer=block.buf)
+        return self.columns[name]
+
+    def slice(self, start:int, stop:int) -> 'DatasetSlice':
+        """
+        Returns a zero-copy view of the issues in [start, stop).
+        """
+        return DatasetSlice(self, start, stop)
+
+    def partitions(self, count:int) -> List[Tuple[int, int]]:
+        """
+        Splits the issues into up to count contiguous (start, stop) ranges of
+        about equal size, e.g. one per worker process.
+        """
+        step = max(1, math.ceil(self.size / max(1, count)))
+        return [(start, min(start + step, self.size)) for start in range(0, self.size, step)]
+
+    def close(self):
+        """
+        Releases this process' mapping of the dataset and, in the publishing
+        process, frees the shared memory. Views obtained from the dataset
+        must not be used afterwards.
+        """
+        self.columns = {}
+        for block in self._blocks.values():
+            block.close()
+            if self._owner:
+                block.unlink()
+        self._blocks = {}
+
+    def __len__(self):
+        return self.size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class DatasetSlice:
+    """
+    Zero-copy view of a contiguous range of the issues in a SharedDataset.
+    Indexes passed to its methods are relative to the start of the slice.
+    """
+
+    def __init__(self, dataset:SharedDataset, start:int, stop:int):
+        """
+        Constructor
+        """
+        self.dataset = dataset
+        self.start = start
+        self.stop = stop
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def column(self, name:str) -> np.ndarray:
+        """
+        Returns the writable view of a column with one value per issue.
+        """
+        return self.dataset.columns[name][self.start:self.stop]
+
+    def labels(self, i:int) -> List[str]:
+        return [self.dataset.labels[code] for code in self._values('label', i)]
+
+    def assignees(self, i:int) -> List[str]:
+        return [self.dataset.assignees[code] for code in self._values('assignee', i)]
+
+    def title(self, i:int) -> str:
+        return self._values('title', i).tobytes().decode('utf-8')
+
+    def text(self, i:int) -> str:
+        return self._values('text', i).tobytes().decode('utf-8')
+
+    def rows(self) -> Iterator[dict]:
+        """
+        Yields one dict per issue with the same keys as the attributes of
+        an Issue, so that row-based scoring functions can run unchanged.
+        Events are not shared, only their number: 'events' is a placeholder
+        with the right length.
+        """
+        columns = {name: self.column(name) for name in
+                   ('number', 'state', 'creator', 'created_date', 'updated_date', 'event_count')}
+        for i in range(len(self)):
+            creator = columns['creator'][i]
+            state = columns['state'][i]
+            yield {
+                'number': int(columns['number'][i]),
+                'state': _STATES[state] if state >= 0 else None,
+                'creator': self.dataset.creators[creator] if creator >= 0 else None,
+                'labels': self.labels(i),
+                'assignees': self.assignees(i),
+                'title': self.title(i),
+                'text': self.text(i),
+                'created_date': _datetime(columns['created_date'][i]),
+                'updated_date': _datetime(columns['updated_date'][i]),
+                'events': range(int(columns['event_count'][i])),
+            }
+
+    def _values(self, name:str, i:int) -> np.ndarray:
+        offsets = self.dataset.columns[f'{name}_offsets']
+        return self.dataset.columns[f'{name}_values'][offsets[self.start + i]:offsets[self.start + i + 1]]
+
+
+class _Vocabulary:
+    """
+    Assigns integer codes to strings so they can be stored in numeric arrays.
+    """
+
+    def __init__(self):
+        self.values:List[str] = []
+        self._codes:Dict[str, int] = {}
+
+    def code(self, value:str) -> int:
+        if value is None:
+            return -1
+        if value not in self._codes:
+            self._codes[value] = len(self.values)
+            self.values.append(value)
+        return self._codes[value]
+
+
+def _share(array:np.ndarray) -> Tuple[shared_memory.SharedMemory, ColumnSpec]:
+    """
+    Copies an array into a new shared memory block.
+    """
+    # Shared memory blocks cannot be empty
+    block = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+    return block, ColumnSpec(block.name, array.dtype.str, len(array))
+
+
+def _ragged(name:str, values_per_issue:List, dtype) -> Dict[str, np.ndarray]:
+    """
+    Flattens variable-length values into a values and an offsets array.
+    """
+    offsets = np.zeros(len(values_per_issue) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(values) for values in values_per_issue])
+    flat = b''.join(values_per_issue) if dtype == np.uint8 else [v for values in values_per_issue for v in values]
+    values = np.frombuffer(flat, dtype=np.uint8) if dtype == np.uint8 else np.array(flat, dtype=dtype)
+    return {f'{name}_offsets': offsets, f'{name}_values': values}
+
+
+def _timestamp(date:datetime) -> float:
+    return date.timestamp() if date is not None else math.nan
+
+
+def _datetime(timestamp:float) -> datetime:
+    return datetime.fromtimestamp(timestamp, timezone.utc) if not math.isnan(timestamp) else None
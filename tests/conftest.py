@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The modules live at the top level of the repository, as run.py expects
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
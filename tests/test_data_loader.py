@@ -0,0 +1,89 @@
+"""
+Checks that DataLoader.reload() only decodes the issues that changed in
+the rewritten data file and reuses all others.
+"""
+
+import json
+
+import pytest
+
+import data_loader
+from data_loader import DataLoader
+
+
+def make_record(number, updated_date='2023-02-03T04:05:06+00:00', **fields):
+    record = {'number': number, 'state': 'open', 'labels': ['kind/bug'], 'title': f'Issue {number}',
+              'created_date': '2023-01-02T03:04:05+00:00', 'updated_date': updated_date}
+    record.update(fields)
+    return record
+
+
+@pytest.fixture
+def data_file(tmp_path, monkeypatch):
+    # Start from an empty cache and load the issues from a temporary data file
+    path = tmp_path / 'issues.json'
+    monkeypatch.setenv('ENPM611_PROJECT_DATA_PATH', str(path))
+    monkeypatch.delenv('sample', raising=False)
+    monkeypatch.setattr(data_loader, '_ISSUES', None)
+    monkeypatch.setattr(data_loader, '_SAMPLE', None)
+    monkeypatch.setattr(data_loader, '_VERSIONS', {})
+
+    def write(records):
+        path.write_text(json.dumps(records))
+    return write
+
+
+def by_number(issues):
+    return {issue.number: issue for issue in issues}
+
+
+def test_reload_reuses_unchanged_issues(data_file):
+    data_file([make_record(1), make_record(2), make_record(3)])
+    loader = DataLoader()
+    before = by_number(loader.get_issues())
+
+    data_file([make_record(1), make_record(2, updated_date='2023-03-01T00:00:00+00:00', title='Renamed'), make_record(4)])
+    assert loader.reload() == (1, 1, 1)
+
+    after = loader.get_issues()
+    assert [issue.number for issue in after] == [1, 2, 4]
+    assert after[0] is before[1]
+    assert after[1] is not before[2] and after[1].title == 'Renamed'
+    assert 3 not in by_number(after)
+
+
+def test_reload_without_changes_reuses_all_issues(data_file):
+    data_file([make_record(1), make_record(2)])
+    loader = DataLoader()
+    before = loader.get_issues()
+
+    data_file([make_record(2), make_record(1)])
+    assert loader.reload() == (0, 0, 0)
+    assert [id(issue) for issue in loader.get_issues()] == [id(before[1]), id(before[0])]
+
+
+def test_reload_always_decodes_issues_without_number(data_file):
+    data_file([make_record(1), make_record(None), make_record('abc')])
+    loader = DataLoader()
+    before = loader.get_issues()
+    assert [issue.number for issue in before] == [1, -1, -1]
+
+    data_file([make_record(1), make_record(None), make_record('abc')])
+    loader.reload()
+    after = loader.get_issues()
+    assert after[0] is before[0]
+    assert after[1] is not before[1] and after[2] is not before[2]
+
+
+def test_reload_picks_up_changes_after_several_reloads(data_file):
+    data_file([make_record(1)])
+    loader = DataLoader()
+    loader.get_issues()
+
+    data_file([make_record(1, updated_date='2023-03-01T00:00:00+00:00')])
+    assert loader.reload() == (0, 1, 0)
+    reloaded = loader.get_issues()[0]
+
+    data_file([make_record(1, updated_date='2023-03-01T00:00:00+00:00')])
+    assert loader.reload() == (0, 0, 0)
+    assert loader.get_issues()[0] is reloaded
@@ -0,0 +1,103 @@
+"""
+Checks that the generated decoder produces the same issues as
+Issue.from_json and reports the values it cannot decode.
+"""
+
+from decoder import IssueDecoder
+from model import Issue, State
+
+
+def make_record(number, /, **fields):
+    record = {
+        'url': f'https://github.com/python-poetry/poetry/issues/{number}',
+        'creator': 'alice',
+        'labels': ['kind/bug', 'status/triage'],
+        'state': 'open',
+        'assignees': [],
+        'title': 'Lock file is not updated',
+        'text': 'Running poetry lock does nothing',
+        'number': number,
+        'created_date': '2023-01-02T03:04:05+00:00',
+        'updated_date': '2023-02-03T04:05:06+00:00',
+        'timeline_url': f'https://api.github.com/repos/python-poetry/poetry/issues/{number}/timeline',
+        'events': [
+            {'event_type': 'labeled', 'author': 'bob', 'event_date': '2023-01-02T03:05:00+00:00', 'label': 'kind/bug'},
+            {'event_type': 'commented', 'author': 'carol', 'event_date': '2023-01-03T00:00:00+00:00', 'comment': 'Same here'},
+        ],
+    }
+    record.update(fields)
+    return record
+
+
+def assert_same_issue(expected, actual):
+    assert set(actual.__dict__) == set(expected.__dict__)
+    for name, value in expected.__dict__.items():
+        if name == 'events':
+            assert [e.__dict__ for e in actual.events] == [e.__dict__ for e in value]
+        else:
+            assert getattr(actual, name) == value, name
+
+
+def test_decodes_like_from_json():
+    records = [
+        make_record(1),
+        make_record(2, state='closed', created_date='2022-03-04T05:06:07Z', updated_date='2022-03-05T00:00:00Z'),
+        make_record(3, number='3', assignees=['dave', {'login': 'erin', 'id': 7}]),
+        make_record(4, created_date='March 4, 2022 10:00 UTC'),
+        make_record(5, labels=[], events=[]),
+        {'state': 'open'},
+    ]
+    decoder = IssueDecoder()
+    for record, issue in zip(records, decoder.decode_all(records)):
+        assert_same_issue(Issue(record), issue)
+    assert decoder.report.records == len(records)
+    assert not decoder.report.errors
+
+
+def test_reports_fields_that_cannot_be_decoded():
+    records = [
+        make_record(1, number='abc'),
+        make_record(2, created_date='not a date'),
+        make_record(3, state=['open']),
+        make_record(4, state='unknown'),
+        make_record(5, assignees=[{'id': 7}]),
+        make_record(6, labels='kind/bug'),
+        make_record(7, title=12345, creator={'login': 'alice'}),
+        make_record(8, labels=['kind/bug', {'name': 'area/solver'}, None]),
+    ]
+    decoder = IssueDecoder()
+    issues = decoder.decode_all(records)
+
+    assert issues[0].number == -1
+    assert issues[1].created_date is None
+    assert issues[2].state is None and issues[3].state is None
+    assert issues[4].assignees == []
+    assert issues[5].labels == []
+    assert issues[6].title is None and issues[6].creator is None
+    assert issues[6].text == 'Running poetry lock does nothing'
+    assert issues[7].labels == ['kind/bug']
+    assert decoder.report.errors == {
+        'issue.number': 1, 'issue.created_date': 1, 'issue.state': 2,
+        'issue.assignees': 1, 'issue.labels': 3, 'issue.title': 1, 'issue.creator': 1,
+    }
+    assert decoder.report.describe().startswith('Decoded 8 issues, 10 values could not be decoded')
+
+
+def test_skips_only_the_malformed_events():
+    record = make_record(1)
+    record['events'].insert(1, 'not an event')
+    record['events'].append({'event_type': 'closed', 'event_date': 'yesterday-ish', 'comment': ['Fixed']})
+    decoder = IssueDecoder()
+    issue = decoder.decode(record)
+
+    assert [e.event_type for e in issue.events] == ['labeled', 'commented', 'closed']
+    assert issue.events[-1].event_date is None and issue.events[-1].comment is None
+    assert issue.state == State.open
+    assert decoder.report.errors == {'issue.events': 1, 'event.event_date': 1, 'event.comment': 1}
+
+
+def test_events_that_are_not_a_list_are_reported():
+    decoder = IssueDecoder()
+    issue = decoder.decode(make_record(1, events={'event_type': 'closed'}))
+    assert issue.events == []
+    assert decoder.report.errors == {'issue.events': 1}
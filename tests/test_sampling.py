@@ -0,0 +1,115 @@
+"""
+Checks the stratified sample and that the confidence intervals of its
+estimates cover the true values about as often as they should.
+"""
+
+import random
+from collections import Counter
+
+import pytest
+
+from decoder import IssueDecoder
+from sampling import StratifiedSampler, parse_sample_spec, stratum_of
+
+LABELS = ['kind/bug', 'kind/feature', 'kind/question', 'area/installer', 'area/solver', 'status/triage']
+
+
+def make_records(count=3000, seed=0):
+    rng = random.Random(seed)
+    records = []
+    for number in range(count):
+        labels = [rng.choice(LABELS)]
+        if rng.random() < 0.5:
+            labels.append(rng.choice(LABELS))
+        records.append({'number': number, 'state': rng.choice(['open', 'closed']), 'labels': labels})
+    # A stratum too rare to be sampled on its own
+    records += [{'number': count + i, 'state': 'open', 'labels': ['rare']} for i in range(3)]
+    return records
+
+
+def draw(records, spec, seed):
+    return StratifiedSampler(spec, seed).sample(iter(records), IssueDecoder().decode)
+
+
+@pytest.mark.parametrize('spec', [50, 300, 0.02, 0.1])
+def test_label_count_intervals_cover_true_counts(spec):
+    records = make_records()
+    truth = Counter(label for record in records for label in record['labels'])
+    covered = total = 0
+    for seed in range(40):
+        for label, estimate in draw(records, spec, seed).estimate_totals(lambda issue: issue.labels).items():
+            assert estimate.low is not None
+            total += 1
+            covered += estimate.low <= truth[label] <= estimate.high
+    # Nominally 95%, allow for the normal approximation and the randomness of 40 samples
+    assert covered / total >= 0.85
+
+
+def test_mean_interval_covers_true_mean():
+    records = make_records()
+    truth = sum(len(record['labels']) for record in records) / len(records)
+    covered = 0
+    for seed in range(40):
+        sample = draw(records, 100, seed)
+        estimate = sample.estimate_mean([len(issue.labels) for issue in sample.issues])
+        covered += estimate.low <= truth <= estimate.high
+    assert covered / 40 >= 0.85
+
+
+def test_count_draws_exactly_that_many_issues():
+    records = make_records()
+    sample = draw(records, 200, 1)
+    assert len(sample.issues) == 200
+    assert sample.population_size == len(records)
+    assert sum(sample.weights()) == pytest.approx(len(records))
+
+
+def test_same_seed_draws_same_sample():
+    records = make_records()
+    numbers = lambda sample: [issue.number for issue in sample.issues]
+    assert numbers(draw(records, 100, 7)) == numbers(draw(records, 100, 7))
+
+
+def test_tiny_sample_reports_intervals_as_unavailable():
+    sample = draw(make_records(), 1, 0)
+    estimates = sample.estimate_totals(lambda issue: issue.labels)
+    assert estimates
+    for estimate in estimates.values():
+        assert estimate.low is None and estimate.high is None
+        assert 'CI unavailable' in str(estimate)
+
+
+def test_full_sample_gives_exact_counts():
+    records = make_records(count=200)
+    truth = Counter(label for record in records for label in record['labels'])
+    estimates = draw(records, 1.0, 0).estimate_totals(lambda issue: issue.labels)
+    for label, estimate in estimates.items():
+        assert estimate.value == pytest.approx(truth[label])
+        assert estimate.low == pytest.approx(truth[label]) and estimate.high == pytest.approx(truth[label])
+
+
+@pytest.mark.parametrize('value, expected', [('500', 500), ('0.05', 0.05), ('1.0', 1.0)])
+def test_parses_sample_spec(value, expected):
+    assert parse_sample_spec(value) == expected
+
+
+@pytest.mark.parametrize('value', ['0', '1.5', '-3', 'abc'])
+def test_rejects_invalid_sample_spec(value):
+    with pytest.raises(ValueError):
+        parse_sample_spec(value)
+
+
+def test_samples_records_with_malformed_stratum_values():
+    records = make_records(count=200)
+    records += [
+        {'number': 1000, 'state': ['open'], 'labels': ['kind/bug']},
+        {'number': 1001, 'state': 'open', 'labels': [{'name': 'kind/bug'}]},
+        {'number': 1002, 'state': 'unknown', 'labels': 'kind/bug'},
+    ]
+    assert stratum_of(records[-3]) == (None, 'kind/bug')
+    assert stratum_of(records[-2]) == ('open', None)
+    assert stratum_of(records[-1]) == (None, None)
+
+    sample = draw(records, 1.0, 0)
+    assert len(sample.issues) == len(records)
+    assert sample.population_size == len(records)
@@ -0,0 +1,175 @@
+"""
+Checks that issues published in shared memory read back the same in an
+attached dataset, and that the partial results of the worker processes
+add up to those of a single process.
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+
+from decoder import IssueDecoder
+from features.severity_and_impact_analysis import SeverityAndImpactAnalysis
+from model import State
+from shared_dataset import SharedDataset
+
+
+def make_issues():
+    records = [
+        {'number': 1, 'state': 'open', 'creator': 'alice', 'labels': ['kind/bug', 'area/solver'],
+         'assignees': ['bob', {'login': 'carol'}], 'title': 'Lock fails', 'text': 'Bug in the solver',
+         'created_date': '2023-01-02T03:04:05+00:00', 'updated_date': '2023-02-03T04:05:06Z',
+         'events': [{'event_type': 'labeled'}, {'event_type': 'commented'}]},
+        {'number': 2, 'state': 'closed', 'creator': 'bob', 'labels': [], 'assignees': [],
+         'title': 'Ünïcode tïtle ✓', 'text': None, 'created_date': '2022-05-06T07:08:09+00:00'},
+        {'number': 3, 'state': 'unknown', 'labels': ['kind/feature'], 'assignees': ['bob'],
+         'text': 'CI Failure on Windows'},
+        {'number': 4, 'state': 'open', 'creator': 'alice', 'labels': ['kind/bug'], 'assignees': ['carol', 'bob'],
+         'title': 'Crash', 'text': '', 'created_date': '2021-12-31T23:59:59+00:00', 'events': [{}]},
+    ]
+    return IssueDecoder().decode_all(records)
+
+
+def expected_row(issue):
+    return {
+        'number': issue.number,
+        'state': issue.state,
+        'creator': issue.creator,
+        'labels': issue.labels,
+        'assignees': issue.assignees,
+        'title': issue.title or '',
+        'text': issue.text or '',
+        'created_date': issue.created_date,
+        'updated_date': issue.updated_date,
+        'events': range(len(issue.events)),
+    }
+
+
+def test_attached_dataset_reads_back_the_issues():
+    issues = make_issues()
+    with SharedDataset.publish(issues) as dataset:
+        attached = SharedDataset.attach(dataset.handle)
+        try:
+            rows = list(attached.slice(0, len(attached)).rows())
+        finally:
+            attached.close()
+    assert rows == [expected_row(issue) for issue in issues]
+    assert rows[2]['state'] is None and rows[2]['creator'] is None and rows[2]['created_date'] is None
+    assert rows[0]['updated_date'] == datetime(2023, 2, 3, 4, 5, 6, tzinfo=timezone.utc)
+
+
+def test_slice_reads_its_own_range():
+    issues = make_issues()
+    with SharedDataset.publish(issues) as dataset:
+        part = dataset.slice(1, 3)
+        assert len(part) == 2
+        assert part.labels(1) == ['kind/feature']
+        assert part.assignees(1) == ['bob']
+        assert part.title(0) == 'Ünïcode tïtle ✓'
+        assert part.text(1) == 'CI Failure on Windows'
+        assert [row['number'] for row in part.rows()] == [2, 3]
+
+
+def test_workers_write_into_added_columns():
+    with SharedDataset.publish(make_issues()) as dataset:
+        scores = dataset.add_column('score', float)
+        attached = SharedDataset.attach(dataset.handle)
+        try:
+            attached.slice(2, 4).column('score')[:] = [1.5, 2.5]
+            with pytest.raises(RuntimeError):
+                attached.add_column('other', float)
+        finally:
+            attached.close()
+        assert scores.tolist() == [0.0, 0.0, 1.5, 2.5]
+
+
+def test_empty_dataset():
+    with SharedDataset.publish([]) as dataset:
+        assert len(dataset) == 0
+        assert dataset.partitions(4) == []
+        assert list(dataset.slice(0, 0).rows()) == []
+
+
+@pytest.mark.parametrize('size, count, expected', [
+    (3, 8, [(0, 1), (1, 2), (2, 3)]),
+    (4, 1, [(0, 4)]),
+    (4, 0, [(0, 4)]),
+    (4, 2, [(0, 2), (2, 4)]),
+    (4, 3, [(0, 2), (2, 4)]),
+])
+def test_partitions(size, count, expected):
+    with SharedDataset.publish(make_issues()[:size]) as dataset:
+        assert dataset.partitions(count) == expected
+
+
+def test_partitions_cover_all_issues_once():
+    issues = make_issues() * 25
+    with SharedDataset.publish(issues) as dataset:
+        for count in range(1, 12):
+            partitions = dataset.partitions(count)
+            assert len(partitions) <= count
+            assert partitions[0][0] == 0 and partitions[-1][1] == len(issues)
+            assert all(stop == start for (_, stop), (start, _) in zip(partitions, partitions[1:]))
+
+
+def make_scored_issues():
+    # The single-process scoring needs a text and a creation date for every issue
+    return IssueDecoder().decode_all([
+        {'number': number, 'state': 'open' if number % 3 else 'closed', 'labels': labels,
+         'title': title, 'text': f'{title} in CI Failure', 'created_date': f'2023-0{1 + number % 9}-01T00:00:00Z',
+         'events': [{}] * (number % 4)}
+        for number, (labels, title) in enumerate([(['Bug'], 'Bug in lock'), (['Feature'], 'Add flag'),
+                                                  (['Bug', 'CI Failure'], 'Crash'), ([], 'Question')] * 3)
+    ])
+
+
+def test_merged_slice_scores_match_single_process():
+    issues = make_scored_issues()
+    single = SeverityAndImpactAnalysis(issues=issues)
+    single.apply_analysis()
+
+    worker = SeverityAndImpactAnalysis(issues=[])
+    with SharedDataset.publish(issues) as dataset:
+        severity = dataset.add_column('severity_score', float)
+        impact = dataset.add_column('impact_score', float)
+        partials = [worker.score_slice(dataset.slice(start, stop)) for start, stop in dataset.partitions(5)]
+        assert severity.tolist() == pytest.approx(single.df['severity_score'].tolist())
+        assert impact.tolist() == pytest.approx(single.df['impact_score'].tolist())
+        del severity, impact
+
+    merged = SeverityAndImpactAnalysis.merge_aggregates(partials)
+    assert len(partials) == 4
+    for state in State:
+        scores = single.df[single.df['state'] == state.value]
+        assert merged[state.value]['count'] == len(scores)
+        assert merged[state.value]['severity_sum'] == pytest.approx(scores['severity_score'].sum())
+        assert merged[state.value]['impact_sum'] == pytest.approx(scores['impact_score'].sum())
+        assert merged[state.value]['severity_max'] == pytest.approx(scores['severity_score'].max())
+        assert merged[state.value]['impact_max'] == scores['impact_score'].max()
+
+
+def test_parallel_scores_match_single_process(monkeypatch):
+    monkeypatch.setenv('workers', '2')
+    issues = make_scored_issues()
+    single = SeverityAndImpactAnalysis(issues=issues)
+    single.apply_analysis()
+    parallel = SeverityAndImpactAnalysis(issues=issues)
+    parallel.apply_analysis_parallel()
+    assert parallel.df['severity_score'].tolist() == pytest.approx(single.df['severity_score'].tolist())
+    assert parallel.df['impact_score'].tolist() == pytest.approx(single.df['impact_score'].tolist())
+
+
+def test_merge_aggregates():
+    partials = [
+        {'open': {'count': 2, 'severity_sum': 3.0, 'impact_sum': 4.0, 'severity_max': 2.0, 'impact_max': 3.0}},
+        {},
+        {'open': {'count': 1, 'severity_sum': 5.0, 'impact_sum': 1.0, 'severity_max': 5.0, 'impact_max': 1.0},
+         'closed': {'count': 1, 'severity_sum': 0.0, 'impact_sum': 2.0, 'severity_max': 0.0, 'impact_max': 2.0}},
+    ]
+    merged = SeverityAndImpactAnalysis.merge_aggregates(partials)
+    assert merged == {
+        'open': {'count': 3, 'severity_sum': 8.0, 'impact_sum': 5.0, 'severity_max': 5.0, 'impact_max': 3.0},
+        'closed': {'count': 1, 'severity_sum': 0.0, 'impact_sum': 2.0, 'severity_max': 0.0, 'impact_max': 2.0},
+    }
+    # The partial aggregates are not modified
+    assert partials[0]['open']['count'] == 2
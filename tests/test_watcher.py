@@ -0,0 +1,85 @@
+"""
+Checks that DataFileWatcher calls back once per settled change of the
+data file, driven by scripted file signatures instead of a real file.
+"""
+
+from watcher import DataFileWatcher
+
+
+class Stop(Exception):
+    pass
+
+
+def watch(signatures, baseline=None):
+    """
+    Runs the watcher over the given sequence of signatures, one per poll,
+    and returns the signatures at which on_change was called.
+    """
+    signatures = iter(signatures)
+    state = {'current': None}
+    changes = []
+
+    def signature():
+        try:
+            state['current'] = next(signatures)
+        except StopIteration:
+            raise Stop()
+        return state['current']
+
+    watcher = DataFileWatcher('issues.json', lambda: changes.append(state['current']), sleep=lambda seconds: None)
+    watcher.signature = signature
+    try:
+        watcher.watch(baseline)
+    except Stop:
+        pass
+    return changes
+
+
+def test_unchanged_file_does_not_call_back():
+    assert watch([(1, 10)] * 5) == []
+
+
+def test_quick_successive_writes_call_back_once():
+    # Two writes within the debounce period, then the file settles
+    assert watch([(1, 10), (1, 10), (2, 20), (3, 30), (3, 30), (3, 30), (3, 30)]) == [(3, 30)]
+
+
+def test_each_settled_change_calls_back():
+    assert watch([(1, 10), (2, 20), (2, 20), (2, 20), (3, 30), (3, 30)]) == [(2, 20), (3, 30)]
+
+
+def test_change_since_baseline_calls_back():
+    # The file was rewritten while the first analysis was running
+    assert watch([(2, 20), (2, 20), (2, 20)], baseline=(1, 10)) == [(2, 20)]
+
+
+def test_missing_file_does_not_call_back_until_it_is_back():
+    # The file is replaced by deleting and recreating it
+    assert watch([(1, 10), None, None, None, (2, 20), (2, 20)]) == [(2, 20)]
+
+
+def test_debounce_waits_between_polls():
+    waits = []
+    signatures = iter([(1, 10), (2, 20), (2, 20)])
+
+    def signature():
+        try:
+            return next(signatures)
+        except StopIteration:
+            raise Stop()
+
+    watcher = DataFileWatcher('issues.json', lambda: None, interval=1.0, debounce=2.0, sleep=waits.append)
+    watcher.signature = signature
+    try:
+        watcher.watch()
+    except Stop:
+        pass
+    assert waits == [1.0, 2.0, 1.0]
+
+
+def test_signature_of_real_file(tmp_path):
+    path = tmp_path / 'issues.json'
+    watcher = DataFileWatcher(str(path), lambda: None)
+    assert watcher.signature() is None
+    path.write_text('[]')
+    assert watcher.signature()[1] == 2
@@ -0,0 +1,67 @@
+"""
+Watches the data file and calls back when it has been rewritten, so that
+an analysis can be refreshed without re-running run.py by hand.
+"""
+
+import os
+import time
+from typing import Callable, Tuple
+
+
+class DataFileWatcher:
+    """
+    Polls the modification time and size of a file. Polling a single
+    os.stat() per interval is cheap and works the same on all operating
+    systems, unlike native file system notifications.
+    """
+
+    def __init__(self, path:str, on_change:Callable[[], None], interval:float=1.0, debounce:float=2.0,
+                 sleep:Callable[[float], None]=time.sleep):
+        """
+        Constructor. on_change is called once the file has changed and then
+        stayed unchanged for debounce seconds, so that several quick
+        successive writes only trigger one refresh. sleep is used to wait
+        between polls, e.g. to keep open plot windows responsive.
+        """
+        self.path = path
+        self.on_change = on_change
+        self.interval = interval
+        self.debounce = debounce
+        self.sleep = sleep
+
+    def watch(self, baseline:Tuple[int, int]=None):
+        """
+        Watches the file until interrupted (e.g., with Ctrl+C). baseline is
+        the signature() of the version of the file that is already analyzed,
+        taken before it was loaded, so that changes made while loading are
+        not missed. Defaults to the current version.
+        """
+        last = baseline if baseline is not None else self.signature()
+        while True:
+            self.sleep(self.interval)
+            current = self.signature()
+            if current == last:
+                continue
+
+            # Wait for the writes to settle before refreshing
+            while True:
+                self.sleep(self.debounce)
+                settled = self.signature()
+                if settled == current:
+                    break
+                current = settled
+
+            last = current
+            if current is not None:
+                self.on_change()
+
+    def signature(self) -> Tuple[int, int]:
+        """
+        Returns what identifies the current version of the file, or None
+        while it does not exist (e.g., while it is being replaced).
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size